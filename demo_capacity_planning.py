@@ -10,20 +10,20 @@ import os
 import time
 import threading
 from services.capacity_planning_service import CapacityPlanningService
-from services.redis_service import redis_service
+from services.logging_config import configure_logging
+from services.redis_service import MODEL_CHANNEL, redis_service
 
 
 def create_test_logs(log_dir: str, size_mb: int = 2):
     """Create test log files to trigger capacity planning."""
     os.makedirs(log_dir, exist_ok=True)
     
-    # Create a large log file
+    # Create a large log file; the capacity service only looks at its size,
+    # so extend it in one call instead of writing the content line by line
     test_file = os.path.join(log_dir, "test_load.log")
-    chunk = "This is a test log entry to simulate high load. " * 100  # ~5KB per line
     
-    with open(test_file, 'w') as f:
-        for i in range((size_mb * 1024 * 1024) // len(chunk)):
-            f.write(f"{chunk}\n")
+    with open(test_file, 'wb') as f:
+        f.truncate(size_mb * 1024 * 1024)
     
     print(f"✅ Created test log file: {test_file} ({size_mb}MB)")
 
@@ -38,17 +38,23 @@ def remove_test_logs(log_dir: str):
 
 def monitor_redis_changes():
     """Monitor Redis for model changes."""
-    last_model = None
-    while True:
-        current_model = redis_service.get_model()
+    # set_model publishes every change, so subscribe instead of polling the model key
+    pubsub = redis_service.redis_client.pubsub()
+    pubsub.subscribe(MODEL_CHANNEL)
+    last_model = redis_service.get_model()
+    print(f"🔄 Model changed: None → {last_model}")
+    for message in pubsub.listen():
+        if message["type"] != "message":
+            continue
+        current_model = message["data"]
         if current_model != last_model:
             print(f"🔄 Model changed: {last_model} → {current_model}")
             last_model = current_model
-        time.sleep(1)
 
 
 def main():
     """Main demo function."""
+    configure_logging()
     print("🎬 Capacity Planning Service Demo")
     print("=" * 50)
     
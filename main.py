@@ -22,6 +22,7 @@ import time
 import threading
 
 # Import our services
+from services.logging_config import configure_logging
 from services.redis_service import redis_service
 from services.api_server import app
 from services.capacity_planning_service import capacity_planning_service
@@ -93,6 +94,8 @@ def show_usage():
 
 def main():
     """Main entry point."""
+    configure_logging()
+
     if len(sys.argv) < 2:
         show_usage()
         return
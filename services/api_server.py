@@ -1,48 +1,16 @@
-from functools import lru_cache
-import os
+import asyncio
 import time
 import uuid
 from typing import Optional
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from loguru import logger
-import sys
 
-from .redis_service import redis_service
+from .logging_config import configure_logging
+from .redis_service import MODEL_CHANNEL, async_redis_service
 
-
-# Configure logging
-def setup_logging():
-    """Setup logging to both console and file."""
-    # Remove default handler
-    logger.remove()
-
-    # Add console handler
-    logger.add(
-        sys.stdout,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
-        "<level>{level: <8}</level> | "
-        "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
-        "<level>{message}</level>",
-        level="INFO",
-    )
-
-    # Create logs directory if it doesn't exist
-    os.makedirs(".logs", exist_ok=True)
-
-    # Add file handler
-    logger.add(
-        ".logs/api_server_{time:YYYY-MM-DD_HH-mm-ss}.log",
-        rotation="1 second",
-        retention="1 hour",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | "
-        "{name}:{function}:{line} - {message}",
-        level="INFO",
-    )
-
-
-# Setup logging
-setup_logging()
+# Request logs are the capacity planner's traffic signal, so they go to their own sink
+logger = logger.bind(traffic=True)
 
 
 # Pydantic models
@@ -62,6 +30,11 @@ class ChatCompletionRequest(BaseModel):
     model: Optional[str] = None
 
 
+class InitiateAndChatRequest(BaseModel):
+    session_id: Optional[str] = None
+    message: str
+
+
 class ChatCompletionResponse(BaseModel):
     session_id: str
     response: str
@@ -76,16 +49,27 @@ app = FastAPI(title="Data Plane API", version="1.0.0")
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup."""
+    # No-op when the entry point has already configured logging
+    configure_logging()
     logger.info("Starting API server...")
-    if not redis_service.health_check():
+    if not await async_redis_service.health_check():
         logger.error("Redis service is not healthy!")
         raise Exception("Redis service unavailable")
+    app.state.model_watcher = asyncio.create_task(watch_model_changes())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the model watcher, release Redis and flush queued logs on shutdown."""
+    app.state.model_watcher.cancel()
+    await async_redis_service.close()
+    await logger.complete()
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    redis_healthy = redis_service.health_check()
+    redis_healthy = await async_redis_service.health_check()
     return {
         "status": "healthy" if redis_healthy else "unhealthy",
         "redis": "connected" if redis_healthy else "disconnected",
@@ -102,19 +86,14 @@ async def initiate_call(request: InitiateCallRequest):
         # Get current model from Redis
         # This is an oversimplification, we would have to track the state of the model and the deployment
         # We would perform some computation to determine with probability to select which model to use
-        current_model = redis_service.get_model()
+        current_model = await get_model_cached()
         if not current_model:
             # Log the exception, and revert to a default model
             logger.error("No model found in Redis, using default model")
             current_model = "small-model"
 
         new_session_id = session_id + "_" + current_model # In actual code we will hash the model and replace the last 4 digits with the hash, This is just a hack to test the code more easily
-        # Store session model in Redis
-        # Not required in current implementation, can take it out
-        if not redis_service.set_session_model(new_session_id, current_model):
-            raise HTTPException(
-                status_code=500, detail="Failed to store session model"
-            )
+        # The session id carries the model, so chat_completions never needs a Redis session record
 
         logger.info(f"Initiated session {new_session_id} with model {current_model}")
 
@@ -131,7 +110,7 @@ async def initiate_call(request: InitiateCallRequest):
 async def chat_completions(request: ChatCompletionRequest):
     """Process chat completion request."""
     # Add logs to caclulate the time of the request
-    start_time = time.time()
+    start_time = time.perf_counter()
     try:
         # Get the model from the session id
         model_to_use = get_model_from_session_id(request.session_id)
@@ -146,12 +125,12 @@ async def chat_completions(request: ChatCompletionRequest):
         # We cache those fallbacks or something, open to suggestions
         if model_to_use == "large-model":
             response_text = f"Large model response for session {request.session_id}: {request.message}"
-            # Sleep for 2 seconds
-            time.sleep(2)  
+            # Sleep for 2 seconds without blocking the event loop
+            await asyncio.sleep(2)
         elif model_to_use == "small-model":
             response_text = f"Small model response for session {request.session_id}: {request.message}"
-            # Sleep for 1 seconds
-            time.sleep(1)
+            # Sleep for 1 seconds without blocking the event loop
+            await asyncio.sleep(1)
         else:
             response_text = f"Unknown model {model_to_use} response: {request.message}"
 
@@ -159,7 +138,7 @@ async def chat_completions(request: ChatCompletionRequest):
             f"Processed chat completion for session {request.session_id} using {model_to_use}"
         )
         # Add logs to calculate the time of the request
-        end_time = time.time()
+        end_time = time.perf_counter()
         logger.info(f"Chat completion for session {request.session_id} took {end_time - start_time} seconds")
         return ChatCompletionResponse(
             session_id=request.session_id,
@@ -175,14 +154,59 @@ async def chat_completions(request: ChatCompletionRequest):
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+@app.post("/initiate_and_chat", response_model=ChatCompletionResponse)
+async def initiate_and_chat(request: InitiateAndChatRequest):
+    """Initiate a session and process its first chat completion in one round trip."""
+    session = await initiate_call(InitiateCallRequest(session_id=request.session_id))
+    return await chat_completions(
+        ChatCompletionRequest(session_id=session.session_id, message=request.message)
+    )
+
+
 # Helper methods
-@lru_cache(maxsize=10)
-def get_model_from_session_id(session_id: str) -> str:
+class _ModelCache:
+    """Process-local copy of the current model from Redis."""
+
+    value: Optional[str] = None
+    expires: float = 0.0
+
+
+async def get_model_cached(ttl: float = 0.5) -> Optional[str]:
+    """Get the current model, reading Redis at most once per ttl seconds."""
+    now = time.monotonic()
+    if now < _ModelCache.expires:
+        return _ModelCache.value
+    model = await async_redis_service.get_model()
+    if model:
+        _ModelCache.value = model
+        _ModelCache.expires = now + ttl
+    return model
+
+
+async def watch_model_changes():
+    """Invalidate the model cache as soon as a model change is published."""
+    pubsub = async_redis_service.redis_client.pubsub()
+    try:
+        await pubsub.subscribe(MODEL_CHANNEL)
+        async for message in pubsub.listen():
+            if message["type"] == "message":
+                _ModelCache.expires = 0.0
+    except Exception as e:
+        # The cache still expires on its TTL without the watcher
+        logger.error(f"Model change watcher stopped: {e}")
+    finally:
+        await pubsub.aclose()
+
+
+def get_model_from_session_id(session_id: str) -> Optional[str]:
     """Get model from session ID."""
-    return session_id.split("_")[1]
+    # The model is always the last "_" separated suffix
+    _, separator, model = session_id.rpartition("_")
+    return model if separator else None
 
 
 if __name__ == "__main__":
     import uvicorn
 
+    configure_logging()
     uvicorn.run(app, host="0.0.0.0", port=8000)
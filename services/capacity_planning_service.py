@@ -1,11 +1,89 @@
+import mmap
 import os
+import re
 import time
 import threading
+from typing import Dict, List, Optional, Tuple
 from loguru import logger
-import sys
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
 
+from .logging_config import configure_logging
 from .redis_service import redis_service
 
+# Searched over the mapped log bytes, so the file is never decoded. Model names are
+# fixed lowercase constants, so the match is case-sensitive
+_SMALL_MODEL_RE = re.compile(rb"small-model")
+
+
+class _LogDirectoryHandler(FileSystemEventHandler):
+    """Keeps size and mtime of the files in the log directory current from filesystem events."""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._files: Dict[str, Tuple[int, float]] = {}
+
+    @staticmethod
+    def scan(log_dir: str) -> List[Tuple[str, int, float]]:
+        """Get (path, size, mtime) for every file in the directory."""
+        files = []
+        # scandir hands back the file type with each entry, so one stat per file suffices
+        with os.scandir(log_dir) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    stat = entry.stat()
+                    files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def seed(self, log_dir: str):
+        """Add files from a directory scan that no event has reported yet."""
+        files = self.scan(log_dir)
+        with self._lock:
+            # Events that arrived during the scan are newer, so they are kept
+            for path, size, mtime in files:
+                self._files.setdefault(path, (size, mtime))
+
+    def clear(self):
+        """Forget every tracked file."""
+        with self._lock:
+            self._files.clear()
+
+    def snapshot(self) -> List[Tuple[str, int, float]]:
+        """Get (path, size, mtime) for every tracked file."""
+        with self._lock:
+            return [(path, size, mtime) for path, (size, mtime) in self._files.items()]
+
+    def _refresh(self, path: str):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._forget(path)
+            return
+        with self._lock:
+            self._files[path] = (stat.st_size, stat.st_mtime)
+
+    def _forget(self, path: str):
+        with self._lock:
+            self._files.pop(path, None)
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._refresh(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._refresh(event.src_path)
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self._forget(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self._forget(event.src_path)
+            self._refresh(event.dest_path)
+
 
 class CapacityPlanningService:
     def __init__(
@@ -36,87 +114,114 @@ class CapacityPlanningService:
         self.running = False
         self.monitor_thread = None
         self.scale_down_thread = None
+        # Set by stop() to cut simulated spin-ups and monitor waits short
+        self._stop_event = threading.Event()
+        # Latest log directory scan, shared by both monitor threads
+        self._scan_lock = threading.Lock()
+        self._scan_cache_ttl = 1.0
+        self._scan_expires = 0.0
+        self._scan_result: Tuple[int, bool] = (0, False)
+        # Log files tracked from filesystem events while the service is running
+        self._log_tracker = _LogDirectoryHandler()
+        self._observer: Optional[Observer] = None
 
         # Ensure log directory exists
         os.makedirs(log_dir, exist_ok=True)
 
-        # Setup logging
-        self._setup_logging()
-
-    def _setup_logging(self):
-        """Setup logging for the capacity planning service."""
-        # Remove default handler
-        logger.remove()
-
-        # Add console handler
-        logger.add(
-            sys.stdout,
-            format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
-            "<level>{level: <8}</level> | "
-            "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
-            "<level>{message}</level>",
-            level="INFO",
-        )
-
-        # Add file handler
-        logger.add(
-            f"{self.log_dir}/capacity_planning.log",
-            rotation="10 MB",
-            retention="7 days",
-            format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | "
-            "{name}:{function}:{line} - {message}",
-            level="INFO",
-        )
-
-    def get_log_directory_size(self) -> int:
-        """Get total size of log files within the time window."""
-        import time
+    def _scan_logs(self) -> Tuple[int, bool]:
+        """Get size of log files within the time window and whether they mention the small model.
 
+        Both monitor threads poll this, so a scan is reused for up to a second.
+        """
+        with self._scan_lock:
+            now = time.monotonic()
+            if now >= self._scan_expires:
+                self._scan_result = self._scan_log_directory()
+                self._scan_expires = now + self._scan_cache_ttl
+            return self._scan_result
+
+    def _scan_log_directory(self) -> Tuple[int, bool]:
+        """Sum sizes of recent log files and search them for small model usage."""
         total_size = 0
-        current_time = time.time()
-        window_start = current_time - self.capacity_check_time_window
+        has_small_model = False
+        window_start = time.time() - self.capacity_check_time_window
 
         try:
-            for filename in os.listdir(self.log_dir):
-                filepath = os.path.join(self.log_dir, filename)
-                if os.path.isfile(filepath):
-                    # Check if file was modified within the time window
-                    file_mtime = os.path.getmtime(filepath)
-                    if file_mtime >= window_start:
-                        total_size += os.path.getsize(filepath)
+            for path, size, mtime in self._log_file_stats():
+                # Check if file was modified within the time window
+                if mtime < window_start:
+                    continue
+                total_size += size
+                if not has_small_model and size > 0 and path.endswith(".log"):
+                    has_small_model = self._file_mentions_small_model(path)
         except Exception as e:
-            logger.error(f"Error calculating log directory size: {e}")
-        return total_size
+            logger.error(f"Error scanning log directory: {e}")
+        return total_size, has_small_model
+
+    def _log_file_stats(self) -> List[Tuple[str, int, float]]:
+        """Get (path, size, mtime) of log files, from the watcher when it is running."""
+        if self._observer is not None and self._observer.is_alive():
+            return self._log_tracker.snapshot()
+        return _LogDirectoryHandler.scan(self.log_dir)
+
+    def _start_log_watcher(self):
+        """Watch the log directory so sizes are tracked without rescanning it."""
+        observer = Observer()
+        observer.schedule(self._log_tracker, self.log_dir, recursive=False)
+        try:
+            observer.start()
+        except OSError as e:
+            logger.warning(f"Log directory watcher unavailable, falling back to scans: {e}")
+            return
+        self._observer = observer
+        # Seed after the watcher is up so no change falls in between
+        self._log_tracker.seed(self.log_dir)
+
+    def _stop_log_watcher(self):
+        """Stop watching the log directory."""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+            # Changes are no longer tracked, so a restart must start from a fresh scan
+            self._log_tracker.clear()
+
+    @staticmethod
+    def _file_mentions_small_model(filepath: str) -> bool:
+        """Check if a non-empty log file mentions the small model."""
+        try:
+            # Search the mapped bytes directly instead of reading and decoding the file
+            with open(filepath, "rb") as f:
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return _SMALL_MODEL_RE.search(mm) is not None
+        except FileNotFoundError:
+            # Rotated or cleared since the directory was listed
+            return False
+        except (OSError, ValueError) as e:
+            # Unreadable, or emptied since its size was recorded (mmap rejects empty
+            # files); treat it as no match so the caller keeps summing sizes
+            logger.warning(f"Could not search {filepath} for small model usage: {e}")
+            return False
+
+    def get_log_directory_size(self) -> int:
+        """Get total size of log files within the time window."""
+        return self._scan_logs()[0]
 
     def check_logs_for_small_model(self) -> bool:
         """Check if logs within time window contain mentions of small model."""
         # This is not in scope of this project, but we can add it later, needed to scale down
-        import time
-
-        current_time = time.time()
-        window_start = current_time - self.capacity_check_time_window
-
-        try:
-            for filename in os.listdir(self.log_dir):
-                if filename.endswith(".log"):
-                    filepath = os.path.join(self.log_dir, filename)
-                    # Check if file was modified within the time window
-                    file_mtime = os.path.getmtime(filepath)
-                    if file_mtime >= window_start:
-                        with open(filepath, "r") as f:
-                            content = f.read()
-                            if "small-model" in content.lower():
-                                return True
-        except Exception as e:
-            logger.error(f"Error checking logs for small model: {e}")
-        return False
+        return self._scan_logs()[1]
 
     def spin_up_large_model(self) -> bool:
         """Simulate spinning up large model (takes 3 minutes)."""
         logger.info("Starting large model spin-up (simulated 3 minutes)...")
         try:
             # Simulate 3-minute spin-up time
-            time.sleep(15)  # 15 seconds for demo
+            if self._stop_event.wait(15):  # 15 seconds for demo
+                logger.info("Large model spin-up cancelled")
+                return False
 
             # Update Redis to use large model
             success = redis_service.set_model("large-model")
@@ -134,23 +239,31 @@ class CapacityPlanningService:
             logger.error(f"Error during large model spin-up: {e}")
             return False
 
-    def spin_up_small_model(self) -> bool:
-        """Simulate spinning up small model (takes 20 seconds)."""
+    def spin_up_small_model(self, expected_version: Optional[str] = None) -> bool:
+        """Simulate spinning up small model (takes 20 seconds).
+
+        With expected_version, the switch is skipped if the model changed in the meantime.
+        """
         logger.info("Starting small model spin-up (simulated 20 seconds)...")
         try:
             # Simulate 4-second spin-up time
-            time.sleep(4)
+            if self._stop_event.wait(4):
+                logger.info("Small model spin-up cancelled")
+                return False
 
-            # Update Redis to use small model
-            # There are edge cases here, basically we need to make sure that we only set it to small if the large model spin up has not been completed and updated before
-            # We will deal with this in the future, for now we will just set it to small
-            success = redis_service.set_model("small-model")
+            # Update Redis to use small model, unless the large model spin-up has
+            # already completed and updated it; Redis checks this atomically
+            success = redis_service.set_model(
+                "small-model", expected_version=expected_version
+            )
             logger.info(f"Redis model set to small-model: {success}")
             if success:
                 logger.info("Small model spin-up completed successfully")
                 return True
             else:
-                logger.error("Failed to update Redis for small model")
+                logger.warning(
+                    "Small model not applied: model already changed or Redis update failed"
+                )
                 return False
         except Exception as e:
             logger.error(f"Error during small model spin-up: {e}")
@@ -161,7 +274,9 @@ class CapacityPlanningService:
         logger.info("Scaling down models...")
         try:
             # Simulate scale-down operations
-            time.sleep(5)  # Simulate 5 seconds for scale-down
+            if self._stop_event.wait(5):  # Simulate 5 seconds for scale-down
+                logger.info("Scale-down cancelled")
+                return False
 
             # Reset to large model
             success = redis_service.set_model("large-model")
@@ -200,6 +315,15 @@ class CapacityPlanningService:
                     # We also would monitor the state of the request
                     # We would also track something other than the log size to determine if we need to scale up
                     # We also would track and store the entire configuration and update the redis with the state of the models and deployments
+                    # The small model may only take over while this version is current
+                    model_version = redis_service.get_model_version()
+                    if model_version is None:
+                        # Without a version the small model switch could not be checked
+                        # against the large one, so wait for Redis to recover instead
+                        logger.error("Could not read model version, skipping scale-up this cycle")
+                        self._stop_event.wait(self.check_interval)
+                        continue
+
                     # Start large model spin-up in a separate thread
                     large_model_thread = threading.Thread(
                         target=self.spin_up_large_model, daemon=True
@@ -208,7 +332,9 @@ class CapacityPlanningService:
 
                     # Start small model spin-up in a separate thread
                     small_model_thread = threading.Thread(
-                        target=self.spin_up_small_model, daemon=True
+                        target=self.spin_up_small_model,
+                        args=(model_version,),
+                        daemon=True,
                     )
                     small_model_thread.start()
 
@@ -216,11 +342,11 @@ class CapacityPlanningService:
                     large_model_thread.join()
                     small_model_thread.join()
 
-                time.sleep(self.check_interval)
+                self._stop_event.wait(self.check_interval)
 
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
-                time.sleep(self.check_interval)
+                self._stop_event.wait(self.check_interval)
 
     def scale_down_monitor(self):
         """Monitor for scale-down conditions."""
@@ -228,8 +354,7 @@ class CapacityPlanningService:
 
         while self.running:
             try:
-                current_size = self.get_log_directory_size()
-                has_small_model = self.check_logs_for_small_model()
+                current_size, has_small_model = self._scan_logs()
 
                 # Scale down if log size is low and no small model usage
                 if (
@@ -240,11 +365,11 @@ class CapacityPlanningService:
                     logger.info("Conditions met for scale-down")
                     self.scale_down_models()
 
-                time.sleep(self.check_interval * 2)  # Check every 20 seconds
+                self._stop_event.wait(self.check_interval * 2)  # Check every 20 seconds
 
             except Exception as e:
                 logger.error(f"Error in scale-down monitoring: {e}")
-                time.sleep(self.check_interval * 2)
+                self._stop_event.wait(self.check_interval * 2)
 
     def start(self):
         """Start the capacity planning service."""
@@ -253,6 +378,8 @@ class CapacityPlanningService:
             return
 
         self.running = True
+        self._stop_event.clear()
+        self._start_log_watcher()
 
         # Start main monitoring thread
         self.monitor_thread = threading.Thread(
@@ -273,16 +400,25 @@ class CapacityPlanningService:
     def stop(self):
         """Stop the capacity planning service."""
         self.running = False
+        self._stop_event.set()
+        # Waits above return as soon as the event is set, so the threads exit promptly
+        for thread in (self.monitor_thread, self.scale_down_thread):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join()
+        self._stop_log_watcher()
         logger.info("Capacity planning service stopped")
+        # Flush records still queued for the file sink
+        logger.complete()
 
     def get_status(self) -> dict:
         """Get current status of the service."""
+        log_directory_size, has_small_model_usage = self._scan_logs()
         return {
             "running": self.running,
             "current_threshold": self.current_threshold,
             "initial_threshold": self.initial_threshold,
-            "log_directory_size": self.get_log_directory_size(),
-            "has_small_model_usage": self.check_logs_for_small_model(),
+            "log_directory_size": log_directory_size,
+            "has_small_model_usage": has_small_model_usage,
         }
 
 
@@ -291,6 +427,7 @@ capacity_planning_service = CapacityPlanningService()
 
 
 if __name__ == "__main__":
+    configure_logging()
     service = CapacityPlanningService()
     try:
         service.start()
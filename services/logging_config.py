@@ -0,0 +1,70 @@
+import os
+import sys
+from loguru import logger
+
+_configured = False
+
+
+def _is_traffic(record) -> bool:
+    """Records logged through a logger bound with traffic=True."""
+    return record["extra"].get("traffic", False)
+
+
+def configure_logging(log_dir: str = ".logs", service_log_dir: str = ".service_logs"):
+    """Setup logging to both console and file, once per process.
+
+    loguru's logger is shared by every service, so the sinks are configured
+    here instead of by each service. Request traffic goes to time-stamped files
+    in log_dir, which the capacity planner measures; every other record goes to
+    service_log_dir so it never counts as traffic.
+    """
+    global _configured
+    if _configured:
+        return
+
+    # Remove default handler
+    logger.remove()
+
+    # Add console handler
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
+        "<level>{level: <8}</level> | "
+        "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
+        "<level>{message}</level>",
+        level="INFO",
+    )
+
+    # Create logs directories if they don't exist
+    os.makedirs(log_dir, exist_ok=True)
+    os.makedirs(service_log_dir, exist_ok=True)
+
+    # Request traffic: a new file every second, so the planner's time window
+    # only sums recent traffic. Written from loguru's background thread but not
+    # buffered: the planner reads size and mtime, so records must reach the file
+    # as they are written, not when a later record triggers rotation
+    logger.add(
+        os.path.join(log_dir, "api_server_{time:YYYY-MM-DD_HH-mm-ss}.log"),
+        rotation="1 second",
+        retention="1 hour",
+        enqueue=True,
+        filter=_is_traffic,
+        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | "
+        "{name}:{function}:{line} - {message}",
+        level="INFO",
+    )
+
+    # Everything else, including the planner's own lines, stays out of log_dir
+    logger.add(
+        os.path.join(service_log_dir, "app.log"),
+        rotation="10 MB",
+        retention="1 hour",
+        enqueue=True,
+        buffering=65536,
+        filter=lambda record: not _is_traffic(record),
+        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | "
+        "{name}:{function}:{line} - {message}",
+        level="INFO",
+    )
+
+    _configured = True
@@ -1,15 +1,34 @@
 import time
 import redis
+import redis.asyncio
 import logging
 from typing import Optional
 
 
+# Channel that set_model publishes the new model on
+MODEL_CHANNEL = "model-changes"
+
+# Sets the model, bumps its version and publishes the change in one atomic step.
+# When an expected version is given (ARGV[2]), the write only applies if the model
+# has not been changed since that version was read.
+_SET_MODEL_LUA = """
+if ARGV[2] ~= '' and (redis.call('GET', KEYS[2]) or '0') ~= ARGV[2] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1])
+redis.call('INCR', KEYS[2])
+redis.call('PUBLISH', ARGV[3], ARGV[1])
+return 1
+"""
+
+
 class RedisService:
     def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0):
         """Initialize Redis service with connection to Redis server."""
         self.redis_client = redis.Redis(
             host=host, port=port, db=db, decode_responses=True
         )
+        self._set_model_script = self.redis_client.register_script(_SET_MODEL_LUA)
         self._initialize_default_keys()
 
     def _initialize_default_keys(self):
@@ -34,10 +53,34 @@ class RedisService:
             logging.error(f"Failed to get model from Redis: {e}")
             return None
 
-    def set_model(self, model: str) -> bool:
-        """Set the model in Redis."""
+    def get_model_version(self) -> Optional[str]:
+        """Get the version of the current model, bumped by every set_model.
+
+        Returns None if Redis could not be read; callers must not treat that as
+        "no expected version", which would make set_model write unconditionally.
+        """
         try:
-            self.redis_client.set("model", model)
+            return self.redis_client.get("model:version") or "0"
+        except Exception as e:
+            logging.error(f"Failed to get model version from Redis: {e}")
+            return None
+
+    def set_model(self, model: str, expected_version: Optional[str] = None) -> bool:
+        """Set the model in Redis and publish the change.
+
+        With expected_version, the model is only set if it is still at that version.
+        """
+        try:
+            applied = self._set_model_script(
+                keys=["model", "model:version"],
+                args=[model, expected_version or "", MODEL_CHANNEL],
+            )
+            if not applied:
+                logging.info(
+                    f"Skipped Redis model update to {model}: "
+                    f"model changed since version {expected_version}"
+                )
+                return False
             logging.info(f"Updated Redis model to: {model}")
             return True
         except Exception as e:
@@ -74,9 +117,90 @@ class RedisService:
             return False
 
 
+class AsyncRedisService:
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        max_connections: int = 50,
+    ):
+        """Initialize asyncio Redis service on a shared connection pool.
+
+        Used by the FastAPI handlers so Redis round-trips do not block the event loop;
+        default keys are initialized by the synchronous RedisService.
+        """
+        self.redis_client = redis.asyncio.Redis(
+            connection_pool=redis.asyncio.ConnectionPool(
+                host=host,
+                port=port,
+                db=db,
+                decode_responses=True,
+                max_connections=max_connections,
+            )
+        )
+        self._set_model_script = self.redis_client.register_script(_SET_MODEL_LUA)
+
+    async def get_model(self) -> Optional[str]:
+        """Get the current model from Redis."""
+        try:
+            return await self.redis_client.get("model")
+        except Exception as e:
+            logging.error(f"Failed to get model from Redis: {e}")
+            return None
+
+    async def set_model(self, model: str) -> bool:
+        """Set the model in Redis and publish the change."""
+        try:
+            await self._set_model_script(
+                keys=["model", "model:version"], args=[model, "", MODEL_CHANNEL]
+            )
+            logging.info(f"Updated Redis model to: {model}")
+            return True
+        except Exception as e:
+            logging.error(f"Failed to set model in Redis: {e}")
+            return False
+
+    async def set_session_model(self, session_id: str, model: str) -> bool:
+        """Set session selector in Redis."""
+        try:
+            key = f"session:{session_id}"
+            await self.redis_client.set(key, model, ex=3600)  # 1 hour TTL
+            logging.info(f"Set session model for {session_id}: {model}")
+            return True
+        except Exception as e:
+            logging.error(f"Failed to set session model: {e}")
+            return False
+
+    async def get_session_model(self, session_id: str) -> Optional[str]:
+        """Get session selector from Redis."""
+        try:
+            key = f"session:{session_id}"
+            return await self.redis_client.get(key)
+        except Exception as e:
+            logging.error(f"Failed to get session model: {e}")
+            return None
+
+    async def health_check(self) -> bool:
+        """Check if Redis is healthy."""
+        try:
+            await self.redis_client.ping()
+            return True
+        except Exception as e:
+            logging.error(f"Redis health check failed: {e}")
+            return False
+
+    async def close(self):
+        """Close the client and disconnect the connection pool."""
+        await self.redis_client.aclose()
+        await self.redis_client.connection_pool.disconnect()
+
+
 # Global Redis service instance
 # Better to implement as a singleton, hacky for now
 redis_service = RedisService()
+# Async instance for the API server's event loop
+async_redis_service = AsyncRedisService()
 
 
 if __name__ == "__main__":
@@ -3,18 +3,40 @@
 Load Testing Suite for LLM Fallback Routing System
 
 This module implements simple load testing that simulates traffic spikes
-by dumping logs and scale-back by removing logs.
+by dumping logs and scale-back by removing logs. Pass --verbose to show
+per-phase request and log-file progress.
 """
 
+import asyncio
+import errno
+import logging
+import queue
+import sys
 import time
-import statistics
 import os
-from typing import List, Dict, Any
+from array import array
+from collections import Counter
+from typing import List, Dict, NamedTuple, Optional, Tuple
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import httpx
+import numpy as np
+import orjson
 import requests
-import json
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+logger = logging.getLogger(__name__)
+
+# Shared by every request; httpx copies it into each request's own headers
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Request bodies have a fixed shape, so they are filled in with bytes formatting
+# instead of running a JSON encoder per request. The chat body takes the
+# server-issued session id already JSON-encoded
+_INIT_BODY = b'{"session_id":"load-test-%d"}'
+_CHAT_BODY = b'{"session_id":%s,"message":"Request %d"}'
+_COMBINED_BODY = b'{"session_id":"load-test-%d","message":"Request %d"}'
 
 
 @dataclass
@@ -25,12 +47,15 @@ class LoadTestResult:
     total_requests: int
     successful_requests: int
     failed_requests: int
+    queued_requests: int  # Had to wait for a concurrency slot
     total_time: float
     avg_response_time: float
     min_response_time: float
     max_response_time: float
+    p50_response_time: float
     p95_response_time: float
     p99_response_time: float
+    p999_response_time: float
     requests_per_second: float
     error_rate: float
     start_time: datetime
@@ -38,157 +63,309 @@ class LoadTestResult:
     model_usage_stats: Dict[str, int]  # Track which models were used
 
 
+class RequestOutcome(NamedTuple):
+    """Outcome of a single initiate + chat request."""
+
+    success: bool
+    response_time: float
+    model_used: Optional[str] = None
+    error: Optional[str] = None  # Only set for failures
+    waited_for_slot: bool = False
+
+
+@dataclass
+class PhaseResult:
+    """Tallies from one phase of continuous requests.
+
+    Response times stay packed doubles end to end: appended here as requests
+    finish, extended into one run-wide array('d'), and only wrapped by numpy,
+    without a copy, in _calculate_statistics.
+    """
+
+    response_times: array  # One per request
+    successful: int = 0
+    failed: int = 0
+    waited_for_slot: int = 0
+
+
 class LoadTester:
     """Load testing framework for the LLM Fallback Routing System."""
 
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        max_keepalive_connections: int = 64,
+        max_in_flight: Optional[int] = None,
+    ):
         self.base_url = base_url
-        self.session_ids: List[str] = []
-        self.response_times: List[float] = []
-        self.errors: List[str] = []
-        self.model_usage: Dict[str, int] = {"large-model": 0, "small-model": 0}
+        self._init_url = f"{base_url}/initiate_call"
+        self._chat_url = f"{base_url}/chat_completions"
+        self._combined_url = f"{base_url}/initiate_and_chat"
+        # Session ids continue across phases; only the count is kept, not the ids
+        self._next_session_idx = 0
+        # Merged once per phase from the returned results, never from inside a request
+        self.model_usage: Counter[str] = Counter({"large-model": 0, "small-model": 0})
+        # A single event loop and client serve every phase, so keep-alive connections
+        # are reused for the whole run instead of being reopened per phase
+        self._runner = asyncio.Runner()
+        # None sizes the cap from each phase's request rate
+        self._max_in_flight = max_in_flight
+        # Concurrency is set by the request schedule, not by the pool: a connection cap
+        # would queue requests inside their timed window and fail them with PoolTimeout
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=None,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=75,
+            )
+        )
+        self._combined_endpoint = self._runner.run(self._probe_combined())
 
-    def _make_single_request(self, request_number: int) -> Dict[str, Any]:
-        """Make a single request: initiate session then chat completion."""
-        start_time = time.time()
-        
+    async def _probe_combined(self) -> bool:
+        """Check whether the server offers the single-call initiate + chat endpoint."""
         try:
-            # Step 1: Initiate session
-            initiate_response = requests.post(
-                f"{self.base_url}/initiate_call",
-                json={"session_id": f"load-test-{request_number}"},
-                timeout=10,
-            )
-            
-            if initiate_response.status_code != 200:
-                end_time = time.time()
-                return {
-                    "success": False,
-                    "response_time": end_time - start_time,
-                    "status_code": initiate_response.status_code,
-                    "error": f"Failed to initiate session: {initiate_response.text}",
-                }
-            
-            session_data = initiate_response.json()
-            session_id = session_data["session_id"]
-            
-            # Step 2: Chat completion with the session
-            chat_response = requests.post(
-                f"{self.base_url}/chat_completions",
-                json={"session_id": session_id, "message": f"Request {request_number}"},
+            response = await self._client.get(f"{self.base_url}/openapi.json", timeout=5)
+            return response.is_success and "/initiate_and_chat" in orjson.loads(
+                response.content
+            ).get("paths", {})
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            logger.debug(f"Combined endpoint probe failed, using two calls: {e}")
+            return False
+
+    def close(self):
+        """Close the HTTP client and its event loop."""
+        self._runner.run(self._client.aclose())
+        self._runner.close()
+
+    def __enter__(self) -> "LoadTester":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    async def _make_single_request(
+        self, request_number: int, session_number: int, scheduled_time: float
+    ) -> RequestOutcome:
+        """Make a single request: initiate session then chat completion.
+
+        Latency runs from scheduled_time (a perf_counter reading), when the request
+        was due, so a late send or a wait for a concurrency slot is counted rather
+        than omitted.
+        """
+        try:
+            success, model_used, error = await self._exchange(request_number, session_number)
+        except (httpx.HTTPError, orjson.JSONDecodeError, KeyError) as e:
+            success, model_used, error = False, None, str(e)
+        # The clock is read once, on whichever path the request ended
+        return RequestOutcome(success, time.perf_counter() - scheduled_time, model_used, error)
+    
+    async def _exchange(
+        self, request_number: int, session_number: int
+    ) -> Tuple[bool, Optional[str], Optional[str]]:
+        """Run the HTTP calls for one request, returning (success, model_used, error)."""
+        if self._combined_endpoint:
+            # Initiate and chat in one round trip
+            response = await self._client.post(
+                self._combined_url,
+                content=_COMBINED_BODY % (session_number, request_number),
+                headers=_JSON_HEADERS,
                 timeout=30,
             )
-            
-            end_time = time.time()
-            response_time = end_time - start_time
-            
-            if chat_response.status_code == 200:
-                data = chat_response.json()
-                model_used = data.get("model_used", "unknown")
-                self.model_usage[model_used] = self.model_usage.get(model_used, 0) + 1
-                
-                return {
-                    "success": True,
-                    "response_time": response_time,
-                    "status_code": chat_response.status_code,
-                    "data": data,
-                    "model_used": model_used,
-                    "session_id": session_id,
-                }
-            else:
-                return {
-                    "success": False,
-                    "response_time": response_time,
-                    "status_code": chat_response.status_code,
-                    "error": chat_response.text,
-                    "session_id": session_id,
-                }
-                
-        except Exception as e:
-            end_time = time.time()
-            return {
-                "success": False,
-                "response_time": end_time - start_time,
-                "status_code": None,
-                "error": str(e),
-            }
+            if response.is_success:
+                data = orjson.loads(response.content)
+                return True, data.get("model_used", "unknown"), None
+            return False, None, response.text[:200]
+        
+        # Step 1: Initiate session
+        initiate_response = await self._client.post(
+            self._init_url,
+            content=_INIT_BODY % session_number,
+            headers=_JSON_HEADERS,
+            timeout=10,
+        )
+        
+        if not initiate_response.is_success:
+            return False, None, f"Failed to initiate session: {initiate_response.text[:200]}"
+        
+        session_data = orjson.loads(initiate_response.content)
+        session_id = session_data["session_id"]
+        
+        # Step 2: Chat completion with the session
+        chat_response = await self._client.post(
+            self._chat_url,
+            content=_CHAT_BODY % (orjson.dumps(session_id), request_number),
+            headers=_JSON_HEADERS,
+            timeout=30,
+        )
+        
+        if chat_response.is_success:
+            data = orjson.loads(chat_response.content)
+            return True, data.get("model_used", "unknown"), None
+        return False, None, chat_response.text[:200]
     
-    def _make_continuous_requests(self, duration: int, requests_per_second: int = 2) -> List[Dict[str, Any]]:
+    async def _make_limited_request(
+        self,
+        semaphore: asyncio.Semaphore,
+        request_number: int,
+        session_number: int,
+        scheduled_time: float,
+    ) -> RequestOutcome:
+        """Make a single request once a concurrency slot is free."""
+        waited = semaphore.locked()
+        async with semaphore:
+            outcome = await self._make_single_request(
+                request_number, session_number, scheduled_time
+            )
+        return outcome._replace(waited_for_slot=True) if waited else outcome
+    
+    async def _make_continuous_requests(self, duration: int, requests_per_second: int = 2) -> PhaseResult:
         """Make continuous requests for a specified duration, each request initiates then chats."""
-        print(f"🚀 Making continuous requests for {duration}s at {requests_per_second} RPS...")
-        print(f"📝 Each request: initiate session → chat completion")
+        logger.info(f"🚀 Making continuous requests for {duration}s at {requests_per_second} RPS...")
+        logger.info("📝 Each request: initiate session → chat completion")
         
-        all_results = []
+        tasks = []
+        # Enough slots for requests lasting several intervals, so the schedule
+        # rather than the cap sets the achieved rate
+        semaphore = asyncio.Semaphore(
+            self._max_in_flight or max(requests_per_second * 4, 16)
+        )
         interval = 1.0 / requests_per_second
-        start_time = time.time()
-        request_count = 0
-        
-        while time.time() - start_time < duration:
-            # Make single request (initiate + chat)
-            result = self._make_single_request(request_count + 1)
-            all_results.append(result)
-            request_count += 1
+        num_requests = duration * requests_per_second
+        # Session numbers continue from earlier phases, so ids stay unique across the run
+        base = self._next_session_idx
+        self._next_session_idx += num_requests
+        start_time = time.perf_counter()
+        
+        for request_count in range(num_requests):
+            # Each request is due at a fixed offset from the start, so time spent
+            # elsewhere never accumulates into drift below the target rate
+            scheduled_time = start_time + request_count * interval
+            sleep_for = scheduled_time - time.perf_counter()
+            if sleep_for > 0:
+                await asyncio.sleep(sleep_for)
             
-            # Sleep to maintain rate
-            time.sleep(interval)
+            # Launch single request (initiate + chat) without waiting for its response
+            tasks.append(
+                asyncio.create_task(
+                    self._make_limited_request(
+                        semaphore, request_count + 1, base + request_count + 1, scheduled_time
+                    )
+                )
+            )
         
-        print(f"✅ Completed {len(all_results)} requests (initiate + chat each)")
-        return all_results
+        # Tally outcomes as requests finish instead of keeping them all for a second pass
+        phase = PhaseResult(response_times=array("d"))
+        usage: Counter[str] = Counter()
+        for next_outcome in asyncio.as_completed(tasks):
+            outcome = await next_outcome
+            phase.response_times.append(outcome.response_time)
+            phase.waited_for_slot += outcome.waited_for_slot
+            if outcome.success:
+                phase.successful += 1
+                usage[outcome.model_used] += 1
+            else:
+                phase.failed += 1
+                logger.debug(f"Request failed: {outcome.error}")
+        self.model_usage.update(usage)
+        if phase.waited_for_slot:
+            logger.warning(
+                f"⚠️  {phase.waited_for_slot}/{num_requests} requests waited for a concurrency "
+                f"slot; the achieved rate may be below {requests_per_second} RPS"
+            )
+        
+        logger.info(f"✅ Completed {len(phase.response_times)} requests (initiate + chat each)")
+        return phase
+    
+    def _write_one_log(self, filepath: str, file_size_mb: int):
+        """Create a single spike log file of the given size."""
+        # Only the file size is observed, so allocate the blocks directly
+        # instead of writing log entries
+        size_bytes = file_size_mb * 1024 * 1024
+        fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            if hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(fd, 0, size_bytes)
+                except OSError as e:
+                    # glibc already emulates fallocate where the filesystem lacks it, so
+                    # only these mean "unsupported"; ENOSPC, EIO etc. must fail the spike
+                    if e.errno not in (errno.EOPNOTSUPP, errno.EINVAL, errno.ENOSYS):
+                        raise
+                    # A sparse file still reports the size
+                    os.ftruncate(fd, size_bytes)
+            else:
+                # e.g. macOS, which has no posix_fallocate
+                os.ftruncate(fd, size_bytes)
+        finally:
+            os.close(fd)
+        
+        logger.debug(f"📄 Created: {os.path.basename(filepath)} ({file_size_mb}MB)")
     
     def _dump_logs(self, num_files: int = 5, file_size_mb: int = 50):
         """Dump large log files to simulate traffic spike."""
-        print(f"📊 Dumping {num_files} log files ({file_size_mb}MB each) to simulate traffic spike...")
+        logger.info(f"📊 Dumping {num_files} log files ({file_size_mb}MB each) to simulate traffic spike...")
         
         log_dir = "../.logs"
         os.makedirs(log_dir, exist_ok=True)
         
-        # Create large log files
-        for i in range(num_files):
-            filename = f"spike_log_{int(time.time())}_{i}.log"
-            filepath = os.path.join(log_dir, filename)
-            
-            # Create file with specified size
-            with open(filepath, 'w') as f:
-                # Write repeated log entries to reach desired size
-                log_entry = f"[{datetime.now()}] INFO - Simulated high traffic log entry for load testing - this is a much longer log entry to create bigger files faster\n"
-                entries_needed = (file_size_mb * 1024 * 1024) // len(log_entry)
-                
-                for j in range(entries_needed):
-                    f.write(log_entry)
-            
-            print(f"📄 Created: {filename} ({file_size_mb}MB)")
+        # One timestamp per spike; the index keeps the filenames unique
+        ts = int(time.time())
+        filepaths = [
+            os.path.join(log_dir, f"spike_log_{ts}_{i}.log") for i in range(num_files)
+        ]
+        
+        # Create large log files concurrently so the spike lands at once, not file by file
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(num_files, os.cpu_count() or 1)) as executor:
+            list(executor.map(lambda filepath: self._write_one_log(filepath, file_size_mb), filepaths))
+        
+        logger.info(
+            f"✅ Created {num_files} log files ({num_files * file_size_mb}MB) "
+            f"in {time.perf_counter() - start_time:.2f}s"
+        )
     
     def _clear_logs(self):
         """Clear all log files to simulate scale-back."""
-        print("🧹 Clearing log files to simulate scale-back...")
+        logger.info("🧹 Clearing log files to simulate scale-back...")
         log_dir = "../.logs"
         if os.path.exists(log_dir):
             try:
-                deleted_count = 0
-                for filename in os.listdir(log_dir):
-                    filepath = os.path.join(log_dir, filename)
-                    if os.path.isfile(filepath):
-                        os.remove(filepath)
-                        deleted_count += 1
-                        print(f"🗑️  Deleted: {filename}")
-                print(f"✅ Cleared {deleted_count} log files")
+                # scandir reports the entry type itself, so no extra stat per file
+                with os.scandir(log_dir) as entries:
+                    filepaths = [
+                        entry.path for entry in entries if entry.is_file(follow_symlinks=False)
+                    ]
+                # Unlinks release the GIL, so they overlap across threads
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    list(executor.map(os.unlink, filepaths))
+                logger.info(f"✅ Cleared {len(filepaths)} log files")
             except Exception as e:
-                print(f"❌ Error clearing logs: {e}")
+                logger.error(f"❌ Error clearing logs: {e}")
         else:
-            print("ℹ️  Log directory does not exist")
+            logger.info("ℹ️  Log directory does not exist")
     
-    def _calculate_statistics(self, response_times: List[float]) -> Dict[str, float]:
-        """Calculate response time statistics."""
+    def _calculate_statistics(self, response_times: array) -> Dict[str, float]:
+        """Calculate response time statistics, reordering response_times in place."""
         if not response_times:
-            return {"avg": 0, "min": 0, "max": 0, "p95": 0, "p99": 0}
+            return {"avg": 0, "min": 0, "max": 0, "p50": 0, "p95": 0, "p99": 0, "p999": 0}
 
-        sorted_times = sorted(response_times)
+        # Zero-copy float64 view of the packed doubles
+        times = np.frombuffer(response_times, dtype=np.float64)
+        avg = float(times.mean())
+        # Linearly interpolated percentiles from a single partial sort; the 0th and
+        # 100th percentiles are exactly min and max, so they come from the same pass.
+        # The caller's array is scratch, so it is partitioned in place rather than copied
+        minimum, p50, p95, p99, p999, maximum = np.percentile(
+            times, [0, 50, 95, 99, 99.9, 100], overwrite_input=True
+        )
         return {
-            "avg": statistics.mean(response_times),
-            "min": min(response_times),
-            "max": max(response_times),
-            "p95": sorted_times[int(len(sorted_times) * 0.95)],
-            "p99": sorted_times[int(len(sorted_times) * 0.99)],
+            "avg": avg,
+            "min": float(minimum),
+            "max": float(maximum),
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+            "p999": float(p999),
         }
     
     def _print_results(self, result: LoadTestResult):
@@ -199,6 +376,7 @@ class LoadTester:
         print(f"Total Requests: {result.total_requests}")
         print(f"Successful: {result.successful_requests}")
         print(f"Failed: {result.failed_requests}")
+        print(f"Waited for a Concurrency Slot: {result.queued_requests}")
         print(f"Error Rate: {result.error_rate:.2%}")
         print(f"Total Time: {result.total_time:.2f}s")
         print(f"Requests/Second: {result.requests_per_second:.2f}")
@@ -206,8 +384,10 @@ class LoadTester:
         print(f"  Average: {result.avg_response_time:.3f}s")
         print(f"  Min: {result.min_response_time:.3f}s")
         print(f"  Max: {result.max_response_time:.3f}s")
+        print(f"  50th Percentile: {result.p50_response_time:.3f}s")
         print(f"  95th Percentile: {result.p95_response_time:.3f}s")
         print(f"  99th Percentile: {result.p99_response_time:.3f}s")
+        print(f"  99.9th Percentile: {result.p999_response_time:.3f}s")
         print(f"\nModel Usage:")
         for model, count in result.model_usage_stats.items():
             percentage = (
@@ -229,22 +409,22 @@ class LoadTester:
         print("=" * 60)
         
         start_time = datetime.now()
-        all_response_times = []
+        # Each phase's packed times are appended with a buffer copy
+        all_response_times = array("d")
         successful_requests = 0
         failed_requests = 0
+        queued_requests = 0
         
         # Phase 1: Normal traffic (30 seconds)
         print(f"\n🔄 Phase 1: Normal Traffic (30s)")
-        normal_results = self._make_continuous_requests(30, requests_per_second=2)
+        normal_results = self._runner.run(self._make_continuous_requests(30, requests_per_second=2))
         
-        for result in normal_results:
-            all_response_times.append(result["response_time"])
-            if result["success"]:
-                successful_requests += 1
-            else:
-                failed_requests += 1
+        all_response_times.extend(normal_results.response_times)
+        successful_requests += normal_results.successful
+        failed_requests += normal_results.failed
+        queued_requests += normal_results.waited_for_slot
         
-        print(f"✅ Normal traffic completed: {len(normal_results)} requests")
+        print(f"✅ Normal traffic completed: {len(normal_results.response_times)} requests")
         
         # Phase 2: Traffic spike simulation (dump logs)
         print(f"\n📈 Phase 2: Traffic Spike Simulation")
@@ -252,16 +432,14 @@ class LoadTester:
         
         # Phase 3: High traffic after spike (60 seconds)
         print(f"\n🔥 Phase 3: High Traffic After Spike (60s)")
-        high_results = self._make_continuous_requests(60, requests_per_second=5)
+        high_results = self._runner.run(self._make_continuous_requests(60, requests_per_second=5))
         
-        for result in high_results:
-            all_response_times.append(result["response_time"])
-            if result["success"]:
-                successful_requests += 1
-            else:
-                failed_requests += 1
+        all_response_times.extend(high_results.response_times)
+        successful_requests += high_results.successful
+        failed_requests += high_results.failed
+        queued_requests += high_results.waited_for_slot
         
-        print(f"✅ High traffic completed: {len(high_results)} requests")
+        print(f"✅ High traffic completed: {len(high_results.response_times)} requests")
         
         # Phase 4: Scale-back simulation (clear logs)
         print(f"\n📉 Phase 4: Scale-Back Simulation")
@@ -269,16 +447,14 @@ class LoadTester:
         
         # Phase 5: Recovery traffic after scale-back (30 seconds)
         print(f"\n🔄 Phase 5: Recovery Traffic After Scale-Back (30s)")
-        recovery_results = self._make_continuous_requests(30, requests_per_second=2)
+        recovery_results = self._runner.run(self._make_continuous_requests(30, requests_per_second=2))
         
-        for result in recovery_results:
-            all_response_times.append(result["response_time"])
-            if result["success"]:
-                successful_requests += 1
-            else:
-                failed_requests += 1
+        all_response_times.extend(recovery_results.response_times)
+        successful_requests += recovery_results.successful
+        failed_requests += recovery_results.failed
+        queued_requests += recovery_results.waited_for_slot
         
-        print(f"✅ Recovery traffic completed: {len(recovery_results)} requests")
+        print(f"✅ Recovery traffic completed: {len(recovery_results.response_times)} requests")
         
         # Phase 6: Another spike
         print(f"\n📈 Phase 6: Another Traffic Spike")
@@ -286,16 +462,14 @@ class LoadTester:
         
         # Phase 7: Final high traffic after second spike (45 seconds)
         print(f"\n🔥 Phase 7: Final High Traffic After Second Spike (45s)")
-        final_results = self._make_continuous_requests(45, requests_per_second=4)
+        final_results = self._runner.run(self._make_continuous_requests(45, requests_per_second=4))
         
-        for result in final_results:
-            all_response_times.append(result["response_time"])
-            if result["success"]:
-                successful_requests += 1
-            else:
-                failed_requests += 1
+        all_response_times.extend(final_results.response_times)
+        successful_requests += final_results.successful
+        failed_requests += final_results.failed
+        queued_requests += final_results.waited_for_slot
         
-        print(f"✅ Final high traffic completed: {len(final_results)} requests")
+        print(f"✅ Final high traffic completed: {len(final_results.response_times)} requests")
         
         # Phase 8: Final scale-back
         print(f"\n📉 Phase 8: Final Scale-Back")
@@ -303,16 +477,14 @@ class LoadTester:
         
         # Phase 9: Final recovery (15 seconds)
         print(f"\n🔄 Phase 9: Final Recovery (15s)")
-        final_recovery_results = self._make_continuous_requests(15, requests_per_second=1)
+        final_recovery_results = self._runner.run(self._make_continuous_requests(15, requests_per_second=1))
         
-        for result in final_recovery_results:
-            all_response_times.append(result["response_time"])
-            if result["success"]:
-                successful_requests += 1
-            else:
-                failed_requests += 1
+        all_response_times.extend(final_recovery_results.response_times)
+        successful_requests += final_recovery_results.successful
+        failed_requests += final_recovery_results.failed
+        queued_requests += final_recovery_results.waited_for_slot
         
-        print(f"✅ Final recovery completed: {len(final_recovery_results)} requests")
+        print(f"✅ Final recovery completed: {len(final_recovery_results.response_times)} requests")
         
         # Calculate final statistics
         end_time = datetime.now()
@@ -326,17 +498,20 @@ class LoadTester:
             total_requests=total_requests,
             successful_requests=successful_requests,
             failed_requests=failed_requests,
+            queued_requests=queued_requests,
             total_time=total_time,
             avg_response_time=stats["avg"],
             min_response_time=stats["min"],
             max_response_time=stats["max"],
+            p50_response_time=stats["p50"],
             p95_response_time=stats["p95"],
             p99_response_time=stats["p99"],
+            p999_response_time=stats["p999"],
             requests_per_second=total_requests / total_time,
             error_rate=failed_requests / total_requests,
             start_time=start_time,
             end_time=end_time,
-            model_usage_stats=self.model_usage.copy(),
+            model_usage_stats=dict(self.model_usage),
         )
         
         self._print_results(test_result)
@@ -346,34 +521,25 @@ class LoadTester:
         self, results: List[LoadTestResult], filename: str = "load_test_results.json"
     ):
         """Save load test results to JSON file."""
-        data = []
-        for result in results:
-            data.append(
-                {
-                    "test_name": result.test_name,
-                    "total_requests": result.total_requests,
-                    "successful_requests": result.successful_requests,
-                    "failed_requests": result.failed_requests,
-                    "total_time": result.total_time,
-                    "avg_response_time": result.avg_response_time,
-                    "min_response_time": result.min_response_time,
-                    "max_response_time": result.max_response_time,
-                    "p95_response_time": result.p95_response_time,
-                    "p99_response_time": result.p99_response_time,
-                    "requests_per_second": result.requests_per_second,
-                    "error_rate": result.error_rate,
-                    "start_time": result.start_time.isoformat(),
-                    "end_time": result.end_time.isoformat(),
-                    "model_usage_stats": result.model_usage_stats,
-                }
-            )
-
-        with open(filename, "w") as f:
-            json.dump(data, f, indent=2)
+        # orjson serializes the dataclasses and their datetimes (ISO 8601) natively
+        with open(filename, "wb") as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
 
         print(f"📄 Results saved to {filename}")
 
 
+def setup_logging(level: int = logging.WARNING) -> QueueListener:
+    """Route this module's diagnostics through a queue drained by a background thread.
+
+    The returned listener must be started, and stopped to flush it on exit.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(level)
+    logger.propagate = False
+    return QueueListener(log_queue, logging.StreamHandler())
+
+
 def main():
     """Main function to run load tests."""
     print("LLM Fallback Routing System - Simple Load Testing")
@@ -392,15 +558,21 @@ def main():
         return
 
     # Create load tester
-    tester = LoadTester()
-    results = []
+    # Per-phase progress is only shown with --verbose
+    log_listener = setup_logging(logging.INFO if "--verbose" in sys.argv else logging.WARNING)
+    log_listener.start()
+    try:
+        with LoadTester() as tester:
+            results = []
 
-    # Run simple load test
-    print("\n" + "=" * 60)
-    results.append(tester.simple_load_test())
+            # Run simple load test
+            print("\n" + "=" * 60)
+            results.append(tester.simple_load_test())
 
-    # Save results
-    tester.save_results(results)
+            # Save results
+            tester.save_results(results)
+    finally:
+        log_listener.stop()
 
     print("\n🎉 Load testing completed!")
     print("Check the results above and the saved JSON file for detailed analysis.")